@@ -1,268 +1,410 @@
-import csv
-import os
-from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for
-import smtplib
-from email.mime.text import MIMEText
-
-app = Flask(__name__)
-
-DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
-STUDENTS_CSV = os.path.join(DATA_DIR, 'students.csv')
-ATTENDANCE_CSV = os.path.join(DATA_DIR, 'attendance.csv')
-ALERTS_CSV = os.path.join(DATA_DIR, 'alerts.csv')
-
-# Ensure data dir and files exist
-os.makedirs(DATA_DIR, exist_ok=True)
-for path, header in [
-    (STUDENTS_CSV, ['student_id','name','programme','part','course_code','group','phone','email']),
-    (ATTENDANCE_CSV, ['student_id','name','course_code','group','week','class_label','hours','date']),
-    (ALERTS_CSV, ['student_id','name','course_code','group','percent','count','sent7','sent10','sent15'])
-]:
-    if not os.path.exists(path):
-        with open(path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(header)
-
-def load_csv(path):
-    rows = []
-    with open(path, newline='', encoding='utf-8') as f:
-        r = csv.DictReader(f)
-        for row in r:
-            rows.append(row)
-    return rows
-
-def append_csv(path, row):
-    file_exists = os.path.exists(path) and os.path.getsize(path) > 0
-    with open(path, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=row.keys())
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(row)
-
-def save_csv(path, rows, fieldnames):
-    with open(path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
-
-def sum_hours_missed(course_code, group):
-    attendance = load_csv(ATTENDANCE_CSV)
-    missed = {}
-    for a in attendance:
-        if a['course_code'] == course_code and a['group'] == group:
-            sid = a['student_id']
-            hrs = float(a['hours'])
-            missed[sid] = missed.get(sid, 0.0) + hrs
-    return missed
-
-def compute_percentages(course_code, group, total_hours):
-    students = [s for s in load_csv(STUDENTS_CSV) if s['course_code'] == course_code and s['group'] == group]
-    missed = sum_hours_missed(course_code, group)
-    result = []
-    for s in students:
-        sid = s['student_id']
-        hours_missed = missed.get(sid, 0.0)
-        percent = round((hours_missed / float(total_hours)) * 100, 2) if float(total_hours) > 0 else 0.0
-        thresholds = []
-        for t in [7,10,15]:
-            if percent >= t:
-                thresholds.append(f'{t}%')
-        result.append({
-            'student_id': sid,
-            'name': s['name'],
-            'hours_missed': int(hours_missed) if hours_missed.is_integer() else hours_missed,
-            'percent': percent,
-            'thresholds': ', '.join(thresholds) if thresholds else '-',
-            'phone': s['phone'],
-            'email': s['email'],
-        })
-    return result
-
-def load_alerts_map(course_code, group):
-    alerts = load_csv(ALERTS_CSV)
-    m = {}
-    for a in alerts:
-        if a['course_code'] == course_code and a['group'] == group:
-            m[a['student_id']] = a
-    return m
-
-def upsert_alert(student_id, name, course_code, group, percent, hit7=False, hit10=False, hit15=False):
-    alerts = load_csv(ALERTS_CSV)
-    found = None
-    for a in alerts:
-        if a['student_id'] == student_id and a['course_code'] == course_code and a['group'] == group:
-            found = a
-            break
-    if found:
-        found['percent'] = str(percent)
-        found['count'] = str(int(found.get('count', '0')) + 1)
-        if hit7:  found['sent7']  = 'yes'
-        if hit10: found['sent10'] = 'yes'
-        if hit15: found['sent15'] = 'yes'
-    else:
-        alerts.append({
-            'student_id': student_id,
-            'name': name,
-            'course_code': course_code,
-            'group': group,
-            'percent': str(percent),
-            'count': '1',
-            'sent7': 'yes' if hit7 else '',
-            'sent10': 'yes' if hit10 else '',
-            'sent15': 'yes' if hit15 else ''
-        })
-    save_csv(ALERTS_CSV, alerts, ['student_id','name','course_code','group','percent','count','sent7','sent10','sent15'])
-
-def build_email_text(name, course_code, percent):
-    block_note = ""
-    if percent >= 20:
-        block_note = "\nNote: A student with >=20% absenteeism may be barred from the final exam."
-    body = (
-        f"Attendance Alert:\n\n"
-        f"Please be informed that {name} has {percent}% class absenteeism (course {course_code}).\n"
-        f"Kindly contact your lecturer as soon as possible."
-        f"{block_note}\n\n"
-        f"This is an automated message from AAMAS."
-    )
-    return body
-
-def send_email(to_email, subject, body, smtp_host='localhost', smtp_port=25, user=None, password=None):
-    # Works with a local SMTP server (e.g., postfix) or set custom host/credentials
-    msg = MIMEText(body)
-    msg['Subject'] = subject
-    msg['From'] = 'aamas@localhost'
-    msg['To'] = to_email
-    try:
-        with smtplib.SMTP(smtp_host, smtp_port, timeout=10) as server:
-            if user and password:
-                server.starttls()
-                server.login(user, password)
-            server.send_message(msg)
-        return True, "Email sent"
-    except Exception as e:
-        return False, f"Email failed: {e}"
-
-def send_sms_stub(phone, text):
-    # Stub to keep it offline. Log-only; integrate later with a real SMS gateway.
-    print(f"[SMS] to {phone}: {text}")
-    return True, "SMS logged"
-
-@app.route('/')
-def home():
-    return render_template('index.html')
-
-@app.route('/upload-students', methods=['GET', 'POST'])
-def upload_students():
-    if request.method == 'POST':
-        file = request.files.get('file')
-        if not file:
-            return render_template('upload_students.html', msg="No file selected")
-        # Save/overwrite the master students.csv with uploaded content
-        try:
-            content = file.stream.read().decode('utf-8').splitlines()
-            reader = csv.DictReader(content)
-            required = ['student_id','name','programme','part','course_code','group','phone','email']
-            if reader.fieldnames != required:
-                return render_template('upload_students.html', msg=f"Invalid header. Expected: {', '.join(required)}")
-            save_csv(STUDENTS_CSV, list(reader), required)
-            return render_template('upload_students.html', msg="Students uploaded successfully")
-        except Exception as e:
-            return render_template('upload_students.html', msg=f"Upload failed: {e}")
-    return render_template('upload_students.html')
-
-@app.route('/record-absence', methods=['GET', 'POST'])
-def record_absence():
-    if request.method == 'POST':
-        data = {
-            'student_id': request.form.get('student_id', '').strip(),
-            'name': '',  # resolve from students list
-            'course_code': request.form.get('course_code', '').strip(),
-            'group': request.form.get('group', '').strip(),
-            'week': request.form.get('week', '').strip(),
-            'class_label': request.form.get('class_label', '').strip(),
-            'hours': request.form.get('hours', '0').strip(),
-            'date': request.form.get('date', '').strip()
-        }
-        # Basic validation and name resolution
-        students = load_csv(STUDENTS_CSV)
-        match = next((s for s in students if s['student_id'] == data['student_id']), None)
-        if not match:
-            return render_template('record_absence.html', msg="Student not found")
-        data['name'] = match['name']
-        try:
-            float(data['hours'])
-        except:
-            return render_template('record_absence.html', msg="Hours must be numeric")
-
-        append_csv(ATTENDANCE_CSV, data)
-        return render_template('record_absence.html', msg="Absence recorded")
-    return render_template('record_absence.html')
-
-@app.route('/report', methods=['GET'])
-def report():
-    course_code = request.args.get('course_code')
-    group = request.args.get('group')
-    total_hours = request.args.get('total_hours')
-    rows = None
-    if course_code and group and total_hours:
-        rows = compute_percentages(course_code, group, total_hours)
-    return render_template('report.html', rows=rows, course_code=course_code, group=group, total_hours=total_hours)
-
-@app.route('/alerts', methods=['GET'])
-def alerts():
-    course_code = request.args.get('course_code')
-    group = request.args.get('group')
-    total_hours = request.args.get('total_hours')
-    rows = None
-    if course_code and group and total_hours:
-        computed = compute_percentages(course_code, group, total_hours)
-        alert_map = load_alerts_map(course_code, group)
-        rows = []
-        for r in computed:
-            if r['percent'] >= 7:
-                a = alert_map.get(r['student_id'], {})
-                rows.append({
-                    **r,
-                    'sent7': a.get('sent7', ''),
-                    'sent10': a.get('sent10', ''),
-                    'sent15': a.get('sent15', ''),
-                    'count': a.get('count', '0')
-                })
-    return render_template('alerts.html', rows=rows, course_code=course_code, group=group, total_hours=total_hours)
-
-@app.route('/send-alerts', methods=['POST'])
-def send_alerts():
-    course_code = request.form.get('course_code')
-    group = request.form.get('group')
-    total_hours = request.form.get('total_hours')
-    selected = request.form.getlist('selected')
-
-    computed = compute_percentages(course_code, group, total_hours)
-    target = [r for r in computed if r['student_id'] in selected]
-
-    sent_count = 0
-    for r in target:
-        percent = r['percent']
-        hit7 = percent >= 7
-        hit10 = percent >= 10
-        hit15 = percent >= 15
-
-        subject = f"Attendance Alert ({course_code})"
-        body = build_email_text(r['name'], course_code, percent)
-        ok_email, _ = send_email(r['email'], subject, body)
-
-        # SMS stub (logged to console only)
-        sms_text = f"{r['name']} has {percent}% absenteeism for {course_code}. Please advise."
-        ok_sms, _ = send_sms_stub(r['phone'], sms_text)
-
-        if ok_email or ok_sms:
-            upsert_alert(r['student_id'], r['name'], course_code, group, percent, hit7, hit10, hit15)
-            sent_count += 1
-
-    msg = f"Alerts processed for {sent_count} student(s)"
-    return render_template('alerts.html', msg=msg, course_code=course_code, group=group, total_hours=total_hours)
-
-if __name__ == '__main__':
-    app.run(debug=True)
+import csv
+import io
+import os
+import re
+import threading
+from collections import namedtuple
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from flask import Flask, render_template, request, redirect, url_for
+import smtplib
+from email.mime.text import MIMEText
+
+from db import conn
+
+app = Flask(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+STUDENTS_CSV = os.path.join(DATA_DIR, 'students.csv')
+ATTENDANCE_CSV = os.path.join(DATA_DIR, 'attendance.csv')
+ALERTS_CSV = os.path.join(DATA_DIR, 'alerts.csv')
+
+STUDENT_FIELDS = ['student_id','name','programme','part','course_code','group','phone','email']
+ATTENDANCE_FIELDS = ['student_id','name','course_code','group','week','class_label','hours','date']
+ALERT_FIELDS = ['student_id','name','course_code','group','percent','count','sent7','sent10','sent15']
+
+# Compiled once at import; one pattern per STUDENT_FIELDS column, applied
+# positionally while the upload streams through. Phone and email may be
+# blank — a missing contact only degrades alert delivery for that student,
+# so it must not reject the whole roster — but a present value has to be
+# well-formed.
+STUDENT_VALIDATORS = (
+    re.compile(r'\S+'),                  # student_id
+    re.compile(r'.+'),                   # name
+    re.compile(r'.+'),                   # programme
+    re.compile(r'.+'),                   # part
+    re.compile(r'\S+'),                  # course_code
+    re.compile(r'\S+'),                  # group
+    re.compile(r'(\+?[\d\s-]{3,})?'),    # phone (optional)
+    re.compile(r'([^@\s]+@[^@\s]+)?'),   # email (optional)
+)
+
+def _validated_student_rows(reader):
+    # Takes positional csv.reader rows (header already consumed). Fails
+    # fast on the first bad cell; the surrounding transaction rolls back,
+    # so a rejected upload leaves the previous roster untouched.
+    for lineno, row in enumerate(reader, start=2):
+        if len(row) != len(STUDENT_FIELDS):
+            raise ValueError(f"expected {len(STUDENT_FIELDS)} columns on line {lineno}, got {len(row)}")
+        for field, value, pattern in zip(STUDENT_FIELDS, row, STUDENT_VALIDATORS):
+            if not pattern.fullmatch(value):
+                raise ValueError(f"invalid {field} {value!r} on line {lineno}")
+        yield row
+
+def _import_legacy_csv():
+    # One-time pull of data left behind by the old CSV storage. Only runs
+    # when a table is still empty and the matching CSV file exists.
+    for path, table, ncols in [
+        (STUDENTS_CSV, 'students', len(STUDENT_FIELDS)),
+        (ATTENDANCE_CSV, 'attendance', len(ATTENDANCE_FIELDS)),
+        (ALERTS_CSV, 'alerts', len(ALERT_FIELDS)),
+    ]:
+        if conn.execute(f'SELECT 1 FROM {table} LIMIT 1').fetchone():
+            continue
+        if not os.path.exists(path):
+            continue
+        with open(path, newline='', encoding='utf-8') as f:
+            r = csv.reader(f)
+            next(r, None)  # header
+            placeholders = ','.join('?' * ncols)
+            conn.executemany(f'INSERT INTO {table} VALUES ({placeholders})',
+                             (row for row in r if len(row) == ncols))
+    conn.commit()
+
+_import_legacy_csv()
+
+def _warmup():
+    # Touch every table at import so the first request pays warm-request
+    # latency. Under `gunicorn --preload` this also leaves the database
+    # file hot in the OS page cache before workers fork; each worker opens
+    # its own connection afterwards (see db.py). Set AAMAS_WARMUP=0 to skip.
+    for table in ('students', 'attendance', 'alerts'):
+        conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()
+
+if os.environ.get('AAMAS_WARMUP', '1') == '1':
+    _warmup()
+
+# Held across every write transaction. The dev server is threaded and the
+# connection is shared, so without this a concurrent `with conn:` block
+# could commit another thread's half-done transaction (e.g. the DELETE of
+# a roster upload without its INSERTs).
+_write_lock = threading.Lock()
+
+# Bumped on every write so cached per-(course, group) computations are
+# invalidated automatically; reads during a browsing session become a
+# counter check plus a dict lookup.
+_data_version = 0
+
+def _bump_data_version():
+    global _data_version
+    _data_version += 1
+
+def _cache_version():
+    # Cache key for the memoized readers. The local counter covers writes
+    # made by this process; PRAGMA data_version covers writes committed by
+    # any *other* connection (e.g. a sibling gunicorn worker), which this
+    # connection sees as a changed value on its next read. Together they
+    # keep invalidation exact across processes, not just in-process.
+    return (_data_version,
+            conn.execute('PRAGMA data_version').fetchone()[0])
+
+# Threshold display string by bitmask (bit0: >=7%, bit1: >=10%, bit2: >=15%).
+# Thresholds are monotone so only masks 0, 1, 3 and 7 are reachable; the
+# rest are filled in anyway so the table is total.
+THRESH_TABLE = [
+    '-', '7%', '10%', '7%, 10%',
+    '15%', '7%, 15%', '10%, 15%', '7%, 10%, 15%',
+]
+
+# Lightweight report rows; the templates read these by attribute, and a
+# namedtuple is markedly cheaper than a 7-key dict per student.
+ReportRow = namedtuple('ReportRow', ['student_id','name','hours_missed','percent','thresholds','phone','email'])
+AlertRow = namedtuple('AlertRow', ReportRow._fields + ('sent7','sent10','sent15','count'))
+
+def compute_percentages(course_code, group, total_hours):
+    # Normalised to float so '30' and '30.0' share one cache entry across
+    # the report, alerts and send-alerts views
+    return _compute_percentages(_cache_version(), course_code, group, float(total_hours))
+
+@lru_cache(maxsize=128)
+def _compute_percentages(version, course_code, group, total_hours):
+    # Join and aggregate inside the engine; Python only formats the rows.
+    # Grouping by s.rowid keeps one output row per student row.
+    students = conn.execute(
+        'SELECT s.student_id, s.name, s.phone, s.email, COALESCE(SUM(a.hours), 0.0) '
+        'FROM students s LEFT JOIN attendance a '
+        'ON a.student_id=s.student_id AND a.course_code=? AND a.group_name=? '
+        'WHERE s.course_code=? AND s.group_name=? '
+        'GROUP BY s.rowid ORDER BY s.rowid',
+        (course_code, group, course_code, group)).fetchall()
+    scale = (100.0 / total_hours) if total_hours > 0 else 0.0
+    result = []
+    for sid, name, phone, email, hours_missed in students:
+        # Equivalent to round(x, 2) for the non-negative values seen here,
+        # but stays in C-level float/int ops instead of the slow round()
+        percent = int(hours_missed * scale * 100.0 + 0.5) / 100.0
+        mask = (percent >= 7) + 2 * (percent >= 10) + 4 * (percent >= 15)
+        result.append(ReportRow(
+            sid, name,
+            int(hours_missed) if hours_missed.is_integer() else hours_missed,
+            percent, THRESH_TABLE[mask], phone, email))
+    return result
+
+def get_student_name(student_id):
+    return _get_student_name(_cache_version(), student_id)
+
+@lru_cache(maxsize=1024)
+def _get_student_name(version, student_id):
+    row = conn.execute('SELECT name FROM students WHERE student_id=?',
+                       (student_id,)).fetchone()
+    return row[0] if row else None
+
+def load_alerts_map(course_code, group):
+    return _load_alerts_map(_cache_version(), course_code, group)
+
+@lru_cache(maxsize=128)
+def _load_alerts_map(version, course_code, group):
+    cur = conn.execute(
+        'SELECT student_id, percent, count, sent7, sent10, sent15 FROM alerts '
+        'WHERE course_code=? AND group_name=?',
+        (course_code, group))
+    m = {}
+    for sid, percent, count, sent7, sent10, sent15 in cur:
+        m[sid] = {'percent': percent, 'count': str(count),
+                  'sent7': sent7, 'sent10': sent10, 'sent15': sent15}
+    return m
+
+_UPSERT_ALERT_SQL = (
+    'INSERT INTO alerts (student_id, name, course_code, group_name, percent, count, sent7, sent10, sent15) '
+    'VALUES (?,?,?,?,?,1,?,?,?) '
+    'ON CONFLICT(student_id, course_code, group_name) DO UPDATE SET '
+    'percent=excluded.percent, count=count+1, '
+    "sent7=CASE WHEN excluded.sent7='yes' THEN 'yes' ELSE sent7 END, "
+    "sent10=CASE WHEN excluded.sent10='yes' THEN 'yes' ELSE sent10 END, "
+    "sent15=CASE WHEN excluded.sent15='yes' THEN 'yes' ELSE sent15 END"
+)
+
+def upsert_alert(student_id, name, course_code, group, percent, hits=0, commit=True):
+    # hits is a threshold bitmask (bit0: 7%, bit1: 10%, bit2: 15%), same
+    # layout as THRESH_TABLE. commit=False lets callers batch several
+    # upserts into one transaction; such callers must hold _write_lock
+    # around the whole batch.
+    params = (student_id, name, course_code, group, str(percent),
+              'yes' if hits & 1 else '', 'yes' if hits & 2 else '', 'yes' if hits & 4 else '')
+    if commit:
+        with _write_lock:
+            conn.execute(_UPSERT_ALERT_SQL, params)
+            conn.commit()
+        _bump_data_version()
+    else:
+        conn.execute(_UPSERT_ALERT_SQL, params)
+
+def build_email_text(name, course_code, percent):
+    block_note = ""
+    if percent >= 20:
+        block_note = "\nNote: A student with >=20% absenteeism may be barred from the final exam."
+    body = (
+        f"Attendance Alert:\n\n"
+        f"Please be informed that {name} has {percent}% class absenteeism (course {course_code}).\n"
+        f"Kindly contact your lecturer as soon as possible."
+        f"{block_note}\n\n"
+        f"This is an automated message from AAMAS."
+    )
+    return body
+
+def build_message(to_email, subject, body):
+    msg = MIMEText(body)
+    msg['Subject'] = subject
+    msg['From'] = 'aamas@localhost'
+    msg['To'] = to_email
+    return msg
+
+def send_emails_batch(msgs, smtp_host='localhost', smtp_port=25, user=None, password=None):
+    # Works with a local SMTP server (e.g., postfix) or set custom host/credentials.
+    # One connection (and one optional STARTTLS/login) is shared by the whole
+    # batch instead of a fresh handshake per recipient.
+    results = []
+    try:
+        with smtplib.SMTP(smtp_host, smtp_port, timeout=10) as server:
+            if user and password:
+                server.starttls()
+                server.login(user, password)
+            for msg in msgs:
+                try:
+                    server.send_message(msg)
+                    results.append((True, "Email sent"))
+                except Exception as e:
+                    results.append((False, f"Email failed: {e}"))
+    except Exception as e:
+        # Connection-level failure: mark every message not yet attempted
+        results.extend([(False, f"Email failed: {e}")] * (len(msgs) - len(results)))
+    return results
+
+def send_email(to_email, subject, body, smtp_host='localhost', smtp_port=25, user=None, password=None):
+    msg = build_message(to_email, subject, body)
+    return send_emails_batch([msg], smtp_host, smtp_port, user, password)[0]
+
+_SMTP_POOL_SIZE = 8
+
+def send_emails_parallel(msgs, smtp_host='localhost', smtp_port=25, user=None, password=None):
+    # SMTP is latency-bound, so fan the batch out over a few connections.
+    # smtplib sessions are not thread-safe, so each worker gets its own
+    # connection and sends a strided slice of the batch.
+    if len(msgs) <= 1:
+        return send_emails_batch(msgs, smtp_host, smtp_port, user, password)
+    workers = min(_SMTP_POOL_SIZE, len(msgs))
+    slices = [msgs[i::workers] for i in range(workers)]
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futures = [ex.submit(send_emails_batch, s, smtp_host, smtp_port, user, password)
+                   for s in slices]
+        slice_results = [f.result() for f in futures]
+    # Stitch the strided results back into input order
+    results = [None] * len(msgs)
+    for i, res_slice in enumerate(slice_results):
+        for j, res in enumerate(res_slice):
+            results[i + j * workers] = res
+    return results
+
+def send_sms_stub(phone, text):
+    # Stub to keep it offline. Log-only; integrate later with a real SMS gateway.
+    print(f"[SMS] to {phone}: {text}")
+    return True, "SMS logged"
+
+@app.route('/')
+def home():
+    return render_template('index.html')
+
+@app.route('/upload-students', methods=['GET', 'POST'])
+def upload_students():
+    if request.method == 'POST':
+        file = request.files.get('file')
+        if not file:
+            return render_template('upload_students.html', msg="No file selected")
+        # Replace the master student list with the uploaded content
+        try:
+            # Decode and parse row-by-row off the stream; no full copy in
+            # RAM, and positional rows avoid a dict allocation per student
+            wrapped = io.TextIOWrapper(file.stream, encoding='utf-8', newline='')
+            reader = csv.reader(wrapped)
+            if next(reader, None) != STUDENT_FIELDS:
+                return render_template('upload_students.html', msg=f"Invalid header. Expected: {', '.join(STUDENT_FIELDS)}")
+            with _write_lock, conn:
+                conn.execute('DELETE FROM students')
+                conn.executemany(
+                    'INSERT INTO students VALUES (?,?,?,?,?,?,?,?)',
+                    _validated_student_rows(reader))
+            _bump_data_version()
+            return render_template('upload_students.html', msg="Students uploaded successfully")
+        except Exception as e:
+            return render_template('upload_students.html', msg=f"Upload failed: {e}")
+    return render_template('upload_students.html')
+
+@app.route('/record-absence', methods=['GET', 'POST'])
+def record_absence():
+    if request.method == 'POST':
+        data = {
+            'student_id': request.form.get('student_id', '').strip(),
+            'name': '',  # resolve from students table
+            'course_code': request.form.get('course_code', '').strip(),
+            'group': request.form.get('group', '').strip(),
+            'week': request.form.get('week', '').strip(),
+            'class_label': request.form.get('class_label', '').strip(),
+            'hours': request.form.get('hours', '0').strip(),
+            'date': request.form.get('date', '').strip()
+        }
+        # Basic validation and name resolution
+        name = get_student_name(data['student_id'])
+        if name is None:
+            return render_template('record_absence.html', msg="Student not found")
+        data['name'] = name
+        try:
+            hours = float(data['hours'])
+        except:
+            return render_template('record_absence.html', msg="Hours must be numeric")
+
+        with _write_lock, conn:
+            conn.execute(
+                'INSERT INTO attendance VALUES (?,?,?,?,?,?,?,?)',
+                (data['student_id'], data['name'], data['course_code'], data['group'],
+                 data['week'], data['class_label'], hours, data['date']))
+        _bump_data_version()
+        return render_template('record_absence.html', msg="Absence recorded")
+    return render_template('record_absence.html')
+
+@app.route('/report', methods=['GET'])
+def report():
+    course_code = request.args.get('course_code')
+    group = request.args.get('group')
+    total_hours = request.args.get('total_hours')
+    rows = None
+    if course_code and group and total_hours:
+        rows = compute_percentages(course_code, group, total_hours)
+    return render_template('report.html', rows=rows, course_code=course_code, group=group, total_hours=total_hours)
+
+@app.route('/alerts', methods=['GET'])
+def alerts():
+    course_code = request.args.get('course_code')
+    group = request.args.get('group')
+    total_hours = request.args.get('total_hours')
+    rows = None
+    if course_code and group and total_hours:
+        computed = compute_percentages(course_code, group, total_hours)
+        alert_map = load_alerts_map(course_code, group)
+        rows = []
+        for r in computed:
+            if r.percent >= 7:
+                a = alert_map.get(r.student_id, {})
+                rows.append(AlertRow(*r,
+                                     a.get('sent7', ''),
+                                     a.get('sent10', ''),
+                                     a.get('sent15', ''),
+                                     a.get('count', '0')))
+    return render_template('alerts.html', rows=rows, course_code=course_code, group=group, total_hours=total_hours)
+
+@app.route('/send-alerts', methods=['POST'])
+def send_alerts():
+    course_code = request.form.get('course_code')
+    group = request.form.get('group')
+    total_hours = request.form.get('total_hours')
+    selected = request.form.getlist('selected')
+
+    computed = compute_percentages(course_code, group, total_hours)
+    # The UI only lists rows at >=7%, but API callers can post anything;
+    # drop non-qualifying rows before any SMTP/SMS work happens
+    target = [r for r in computed if r.student_id in selected and r.percent >= 7]
+
+    # Build every message first, then push them through one SMTP session
+    subject = f"Attendance Alert ({course_code})"
+    msgs = [build_message(r.email, subject, build_email_text(r.name, course_code, r.percent))
+            for r in target]
+    email_results = send_emails_parallel(msgs)
+
+    # The lock spans the whole batched transaction so no other thread can
+    # commit (and so persist) a half-applied batch
+    sent_count = 0
+    with _write_lock:
+        for r, (ok_email, _) in zip(target, email_results):
+            percent = r.percent
+            hits = (percent >= 7) + 2 * (percent >= 10) + 4 * (percent >= 15)
+
+            # SMS stub (logged to console only)
+            sms_text = f"{r.name} has {percent}% absenteeism for {course_code}. Please advise."
+            ok_sms, _ = send_sms_stub(r.phone, sms_text)
+
+            if ok_email or ok_sms:
+                upsert_alert(r.student_id, r.name, course_code, group, percent, hits,
+                             commit=False)
+                sent_count += 1
+
+        # One flush for the whole batch instead of a commit per student
+        if sent_count:
+            conn.commit()
+    if sent_count:
+        _bump_data_version()
+
+    msg = f"Alerts processed for {sent_count} student(s)"
+    return render_template('alerts.html', msg=msg, course_code=course_code, group=group, total_hours=total_hours)
+
+if __name__ == '__main__':
+    app.run(debug=True)
@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import threading
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+DB_PATH = os.path.join(DATA_DIR, 'aamas.db')
+
+# "group" is a reserved word in SQL, so the CSV column `group` is stored
+# as `group_name` in every table.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    student_id TEXT,
+    name TEXT,
+    programme TEXT,
+    part TEXT,
+    course_code TEXT,
+    group_name TEXT,
+    phone TEXT,
+    email TEXT
+);
+CREATE TABLE IF NOT EXISTS attendance (
+    student_id TEXT,
+    name TEXT,
+    course_code TEXT,
+    group_name TEXT,
+    week TEXT,
+    class_label TEXT,
+    hours REAL,
+    date TEXT
+);
+CREATE TABLE IF NOT EXISTS alerts (
+    student_id TEXT,
+    name TEXT,
+    course_code TEXT,
+    group_name TEXT,
+    percent TEXT,
+    count INTEGER,
+    sent7 TEXT,
+    sent10 TEXT,
+    sent15 TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_students_id ON students(student_id);
+CREATE INDEX IF NOT EXISTS idx_students_cg ON students(course_code, group_name);
+DROP INDEX IF EXISTS idx_att_cg;
+CREATE INDEX IF NOT EXISTS idx_att_cover ON attendance(course_code, group_name, student_id, hours);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_alerts_key ON alerts(student_id, course_code, group_name);
+"""
+
+os.makedirs(DATA_DIR, exist_ok=True)
+
+def _connect():
+    # WAL lets the threaded dev server read while writing.
+    # synchronous=NORMAL under WAL appends each commit to the log without
+    # its own fsync — syncs happen in batches at checkpoints — so small
+    # writes like a single recorded absence cost one buffered append, not
+    # an fsync round-trip.
+    c = sqlite3.connect(DB_PATH, check_same_thread=False)
+    c.execute('PRAGMA journal_mode=WAL')
+    c.execute('PRAGMA synchronous=NORMAL')
+    return c
+
+class _PerProcessConnection:
+    # One sqlite3 connection per process behind the module-level `conn`.
+    # SQLite forbids carrying an open connection across fork(), so under
+    # `gunicorn --preload` each worker must open its own; the proxy checks
+    # the pid on every use and reconnects lazily in the child.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _get(self):
+        if self._conn is None or self._pid != os.getpid():
+            with self._lock:
+                if self._conn is None or self._pid != os.getpid():
+                    self._conn = _connect()
+                    self._pid = os.getpid()
+        return self._conn
+
+    def execute(self, *args):
+        return self._get().execute(*args)
+
+    def executemany(self, *args):
+        return self._get().executemany(*args)
+
+    def executescript(self, sql):
+        return self._get().executescript(sql)
+
+    def commit(self):
+        return self._get().commit()
+
+    def __enter__(self):
+        return self._get().__enter__()
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+conn = _PerProcessConnection()
+conn.executescript(_SCHEMA)
+conn.commit()